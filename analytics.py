@@ -1,228 +1,672 @@
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import base64
-from io import BytesIO
-import numpy as np 
-import os # Required for file path checking
-
-# --- CONFIGURATION: SET THE FIXED CSV PATH ---
-# IMPORTANT: Save your accident data as 'accidents.csv' in the same folder as app.py
-FIXED_CSV_PATH = 'accidents.csv'
-
-# --- LOCATION MAPPING HELPER ---
-def _map_location_to_city(location):
-    """Maps a specific location name to a corresponding city based on common Indian city landmarks."""
-    location = str(location).strip()
-    
-    # Define location clusters based on common Indian cities
-    hyderabad_locations = ["Madhapur", "Hitech City", "Gachibowli", "Raidurg Metro Road", 
-                           "Banjara Hills", "Kukatpally", "Ameerpet", "LB Nagar", "Uppal Ring Road"]
-    
-    bengaluru_locations = ["Silk Board", "Electronic", "Marathahalli", "Whitefield", 
-                           "MG Road", "Hebbal Flyover", "Yeshwanthpur"]
-    
-    chennai_locations = ["Guindy Junc", "T Nagar", "OMR Sholinganallur", "Anna Salai", "Poonamallee"]
-
-    vijayawada_locations = ["Benz Circle", "MG Road", "Ring Road", "Kanuru Road", "Ramavarapadu"]
-    
-    # Check for inclusion in city lists
-    if any(loc in location for loc in hyderabad_locations):
-        return "Hyderabad"
-    if any(loc in location for loc in bengaluru_locations):
-        return "Bengaluru"
-    if any(loc in location for loc in chennai_locations):
-        return "Chennai"
-    if any(loc in location for loc in vijayawada_locations):
-        return "Vijayawada"
-        
-    # Default common locations to the selected city if they don't match others.
-    selected_city = st.session_state.get('selected_city')
-    if selected_city and selected_city != "Select City...":
-        return selected_city
-        
-    return "Unknown"
-
-# --- VISUALIZATION HELPERS ---
-
-def _fig_to_base64(fig):
-    """Converts a Matplotlib figure to a base64 encoded string."""
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
-    buf.seek(0)
-    img_b64 = base64.b64encode(buf.read()).decode()
-    plt.close(fig)
-    return img_b64
-
-def _generate_bar_chart(df):
-    """
-    Generates a bar chart for top accident locations.
-    MODIFIED: Uses SUM of the 'accidents' column instead of counting rows.
-    """
-    if df.empty: return ""
-    
-    # --- MODIFIED LOGIC: Use SUM('accidents') or fallback to row count ---
-    if 'accidents' in df.columns:
-        # Sum the 'accidents' column grouped by Location
-        top_locations = df.groupby('Location')['accidents'].sum().nlargest(5)
-    else:
-        # Fallback: Count rows if 'accidents' column is missing/unknown
-        top_locations = df['Location'].value_counts().head(5)
-    # --- END MODIFIED LOGIC ---
-    
-    fig, ax = plt.subplots(figsize=(8, 4))
-    top_locations.plot(kind='bar', ax=ax, color='salmon')
-    
-    ax.set_title('Top 5 Accident Locations', fontsize=10)
-    ax.set_ylabel('Accident Count', fontsize=8)
-    ax.tick_params(axis='x', rotation=45, labelsize=7)
-    plt.tight_layout()
-    return _fig_to_base64(fig)
-
-def _generate_pie_chart(df):
-    """Generates a pie chart for accidents by day of week. Note: This still uses row counts for distribution."""
-    if df.empty: return ""
-    
-    # NOTE: Pie chart logic is trickier if you want to use the 'accidents' column.
-    # To correctly use 'accidents' column: you'd need to group by DayOfWeek and sum 'accidents'.
-    if 'accidents' in df.columns and not df.empty:
-        day_of_week_counts = df.groupby('DayOfWeek')['accidents'].sum()
-    else:
-        # Fallback to counting rows
-        day_of_week_counts = df['DayOfWeek'].value_counts()
-        
-    fig, ax = plt.subplots(figsize=(8, 4))
-    day_of_week_counts.plot(kind='pie', autopct='%1.1f%%', ax=ax, startangle=90)
-    ax.set_title('Accidents by Day of Week', fontsize=10)
-    ax.set_ylabel('')
-    plt.tight_layout()
-    return _fig_to_base64(fig)
-
-# --- CORE ANALYSIS FUNCTION (Modified to accept file path) ---
-def analyze_accident_data(data_source):
-    """Analyzes historical accident data, accepting a file path."""
-    
-    selected_city = st.session_state.get('selected_city')
-    if not selected_city or selected_city == "Select City...":
-        return "Error: Cannot analyze data. Please select a City on the main dashboard first.", None
-    
-    try:
-        # Load Data from fixed file path
-        if isinstance(data_source, str) and os.path.exists(data_source):
-            df = pd.read_csv(data_source)
-        else:
-             return "Error: Fixed CSV file not found or path is incorrect. Ensure 'accidents.csv' is in the root directory.", None
-             
-        # 1a. CRITICAL: Create 'City' column if missing for filtering (Silent Mapping)
-        if 'City' not in df.columns:
-            df['City'] = df['Location'].apply(_map_location_to_city)
-        
-        # 1b. Filter the DataFrame by the selected city
-        df_filtered = df[df['City'].astype(str).str.strip().str.contains(selected_city, case=False, na=False)]
-        
-        if df_filtered.empty:
-            return f"Error: No accident data found in the CSV for the selected city: {selected_city}.", None
-
-        # 2. Proceed with Analysis on the FILTERED DataFrame (df_filtered)
-        
-        df_filtered['Date'] = pd.to_datetime(df_filtered['Date'], errors='coerce')
-        df_filtered.dropna(subset=['Location', 'Date'], inplace=True)
-        df_filtered['DayOfWeek'] = df_filtered['Date'].dt.day_name()
-        
-        # --- MODIFIED LOGIC for total_accidents and high_risk_zone ---
-        if 'accidents' in df_filtered.columns:
-            # 1. Sum the total count from the 'accidents' column
-            total_accidents = df_filtered['accidents'].sum() 
-            
-            # 2. Determine high-risk zone based on the SUM of accidents
-            high_risk_zone = df_filtered.groupby('Location')['accidents'].sum().idxmax()
-        else:
-            # Fallback: count the number of rows if accident count column is missing
-            total_accidents = len(df_filtered)
-            high_risk_zone = df_filtered['Location'].value_counts().idxmax()
-        # --- END MODIFIED LOGIC ---
-        
-        peak_time_str = "N/A (Time data missing in CSV)"
-        # Note: If you want to calculate peak time based on the SUM of accidents, 
-        # you would need to group by Hour and sum the 'accidents' column here too.
-        if 'Time' in df_filtered.columns:
-            df_filtered['Hour'] = pd.to_datetime(df_filtered['Time'], format='%H:%M', errors='coerce').dt.hour
-            df_filtered.dropna(subset=['Hour'], inplace=True)
-            if not df_filtered.empty:
-                peak_hour = df_filtered['Hour'].value_counts().idxmax()
-                peak_time_str = f"{peak_hour}:00 - {peak_hour + 1}:00"
-
-        # 3. Generate Visualizations (The data passed to the visualization functions is df_filtered)
-        bar_chart_b64 = _generate_bar_chart(df_filtered)
-        pie_chart_b64 = _generate_pie_chart(df_filtered)
-
-        # 4. Compile Results
-        analytics_data = {
-            "high_risk_zone": high_risk_zone,
-            "peak_time": peak_time_str,
-            "total_accidents": total_accidents,
-            "charts": {
-                "bar_chart_base64": bar_chart_b64,
-                "pie_chart_base64": pie_chart_b64
-            },
-            "city": selected_city
-        }
-        return analytics_data, df_filtered
-    
-    except Exception as e:
-        return f"An unexpected error occurred during analysis: {e}", None
-
-# --- STREAMLIT MODULE FUNCTION (AUTO-RUN) ---
-# NOTE: This function remains the same as it correctly handles caching and display flow
-def analytics_module():
-    """Triggers the analysis immediately using the fixed CSV file."""
-    
-    st.markdown(f"**Data Source:** :green[Pre-loaded] from `{FIXED_CSV_PATH}`")
-    
-    # 1. Check if City is selected
-    selected_city = st.session_state.get('selected_city')
-    if not selected_city or selected_city == "Select City...":
-        st.info("Please select a City on the main dashboard to run Module 2.")
-        return
-
-    # Initialize data and status message variables
-    data = None
-    run_status_message = None
-
-    # 2. Check and Run/Cache Analysis
-    if st.session_state.get('analytics_data') and st.session_state['analytics_data'].get('city') == selected_city:
-        # Data is cached, no re-run needed
-        data = st.session_state['analytics_data']
-        run_status_message = f"✅ Data Analysis Complete! Results for {selected_city} loaded from cache."
-    else:
-        # Auto-Run Analysis
-        with st.spinner(f'Analyzing background CSV data for {selected_city}...'):
-            analytics_data, df_raw = analyze_accident_data(FIXED_CSV_PATH)
-            
-            if isinstance(analytics_data, dict) and 'high_risk_zone' in analytics_data:
-                st.session_state['analytics_data'] = analytics_data
-                data = analytics_data
-                run_status_message = f"✅ Data Analysis Complete! Results for {selected_city}."
-            else:
-                st.error(f"Module 2 Error: {analytics_data}")
-                return # Stop if analysis failed
-
-    # 3. Display Results 
-    if data:
-        st.success(run_status_message) # Show the single, consolidated status message
-        
-        st.subheader("Key Risk Insights")
-        st.markdown(f"* **High-Risk Zone:** :red[{data['high_risk_zone']}]")
-        st.markdown(f"* **Total Accidents Analyzed:** {data['total_accidents']}")
-        st.markdown(f"* **Peak Accident Time:** {data['peak_time']}")
-        
-        st.subheader("📊 Visualizations")
-        chart_col1, chart_col2 = st.columns(2)
-        
-        if data['charts']['bar_chart_base64']:
-            chart_col1.image(f"data:image/png;base64,{data['charts']['bar_chart_base64']}")
-            chart_col1.caption(f"Top 5 Accident Locations in {data['city']}")
-
-        if data['charts']['pie_chart_base64']:
-            chart_col2.image(f"data:image/png;base64,{data['charts']['pie_chart_base64']}")
-            chart_col2.caption("Accidents by Day of Week")
+import streamlit as st
+from io import BytesIO
+import numpy as np
+import os # Required for file path checking
+import re # Required for the compiled landmark pattern
+import threading # Required for the shared-figure locks
+import hashlib # Required for the chart-cache content hash
+from concurrent.futures import ThreadPoolExecutor
+
+# pandas, matplotlib and Pillow together add ~0.5-1.5 s to every Streamlit
+# cold start, so they are bound lazily on first analysis instead of at import:
+# users who never open the Analytics tab never pay for them.
+pd = None
+plt = None
+FigureCanvasAgg = None
+Image = None
+
+def _ensure_heavy_imports():
+    """Binds pandas/matplotlib/Pillow into the module globals on first use."""
+    global pd, plt, FigureCanvasAgg, Image
+    if Image is not None:
+        return
+    import pandas as _pd
+    import matplotlib
+    # Select the headless Agg backend before pyplot loads: skips Tk/Qt
+    # backend probing, and charts here are only ever rasterized to PNG.
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as _plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg as _canvas
+    from PIL import Image as _image
+    pd, plt, FigureCanvasAgg, Image = _pd, _plt, _canvas, _image
+
+# --- CONFIGURATION: SET THE FIXED CSV PATH ---
+# IMPORTANT: Save your accident data as 'accidents.csv' in the same folder as app.py
+FIXED_CSV_PATH = 'accidents.csv'
+
+# Columnar cache of the loaded CSV: written on the first load, read (5-20x
+# faster than re-parsing CSV) on every load after that. Invalidated by mtime
+# comparison against the CSV. The cache is a sidecar file derived from the
+# CSV path, so loading a different CSV can never serve (or overwrite)
+# another file's cached rows.
+def _parquet_cache_path(csv_path):
+    """Sidecar Parquet cache path for the given CSV (e.g. 'a.csv.parquet')."""
+    return csv_path + '.parquet'
+
+def _parquet_cache_fresh(csv_path):
+    """True when the Parquet cache exists and is at least as new as the CSV."""
+    cache_path = _parquet_cache_path(csv_path)
+    return (os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(csv_path))
+
+def _cached_frame_ok(df):
+    """Rejects Parquet caches written before Date/Time were pinned to string.
+
+    Older caches persisted Time as time32; its datetime.time values coerce
+    entirely to NaT in the downstream to_datetime(format=...) parses, and the
+    mtime freshness check alone would keep serving them forever. A rejected
+    cache falls through to the CSV and is rewritten with the string schema.
+    """
+    for col in ('Date', 'Time'):
+        if col in df.columns and len(df):
+            value = df[col].iloc[0]
+            if not (isinstance(value, str) or pd.isna(value)):
+                return False
+    return True
+
+# --- CACHE DECORATOR (st.cache_data with an lru_cache fallback) ---
+# st.cache_data keeps results across Streamlit reruns so the CSV is parsed once,
+# not on every widget interaction. Older Streamlit versions fall back to lru_cache.
+if hasattr(st, 'cache_data'):
+    _cache_data = st.cache_data
+else:
+    import functools
+    def _cache_data(**_kwargs):
+        def decorator(func):
+            cached = functools.lru_cache(maxsize=8)(func)
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    return cached(*args, **kwargs)
+                except TypeError:
+                    # Unhashable argument (e.g. a Series) - skip memoization.
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+# --- LOCATION MAPPING (vectorized) ---
+# Landmark -> City lookup built once at import time. Insertion order is the
+# precedence rule: when a location mentions several landmarks (e.g. "Ring
+# Road near Silk Board"), the earliest dict entry wins, mirroring the old
+# list-by-list check order. All three backends below (numba, Aho-Corasick,
+# pandas substring scan) resolve ties by this same order, so results don't
+# depend on which optional package is installed.
+LANDMARK_TO_CITY = {
+    # Hyderabad
+    "Madhapur": "Hyderabad", "Hitech City": "Hyderabad", "Gachibowli": "Hyderabad",
+    "Raidurg Metro Road": "Hyderabad", "Banjara Hills": "Hyderabad", "Kukatpally": "Hyderabad",
+    "Ameerpet": "Hyderabad", "LB Nagar": "Hyderabad", "Uppal Ring Road": "Hyderabad",
+    # Bengaluru
+    "Silk Board": "Bengaluru", "Electronic": "Bengaluru", "Marathahalli": "Bengaluru",
+    "Whitefield": "Bengaluru", "MG Road": "Bengaluru", "Hebbal Flyover": "Bengaluru",
+    "Yeshwanthpur": "Bengaluru",
+    # Chennai
+    "Guindy Junc": "Chennai", "T Nagar": "Chennai", "OMR Sholinganallur": "Chennai",
+    "Anna Salai": "Chennai", "Poonamallee": "Chennai",
+    # Vijayawada
+    "Benz Circle": "Vijayawada", "Ring Road": "Vijayawada", "Kanuru Road": "Vijayawada",
+    "Ramavarapadu": "Vijayawada",
+}
+
+# --- OPTIONAL NUMBA FAST PATH ---
+# For very large CSVs, a compiled byte-level substring scan beats even the
+# vectorized regex. The landmark patterns are flattened into one uint8 buffer
+# plus offsets so the jitted kernel works on plain NumPy arrays. Numba is an
+# optional dependency; the regex path above is the fallback.
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# Optional Aho-Corasick automaton: one linear DFA scan per location instead of
+# trying each landmark alternative, so tagging cost stays flat as the landmark
+# list grows. Built once at import when pyahocorasick is installed.
+try:
+    import ahocorasick
+    _AC_AUTOMATON = ahocorasick.Automaton()
+    # The payload carries the landmark's dict rank so ties between multiple
+    # matches resolve by pattern precedence, not match position.
+    for _rank, (_landmark, _city) in enumerate(LANDMARK_TO_CITY.items()):
+        _AC_AUTOMATON.add_word(_landmark, (_rank, _city))
+    _AC_AUTOMATON.make_automaton()
+    _HAS_AHOCORASICK = True
+except ImportError:
+    _HAS_AHOCORASICK = False
+
+# PyArrow is optional too: when present, the fixed CSV is streamed in blocks
+# and filtered batch-by-batch instead of being materialized whole.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_pq
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# index -> city name; code -1 (== index [-1] after appending the default) means
+# "no landmark matched".
+_CITY_NAMES = list(dict.fromkeys(LANDMARK_TO_CITY.values()))
+_LANDMARK_BYTES = [k.encode('utf-8') for k in LANDMARK_TO_CITY]
+_PAT_BUF = np.frombuffer(b''.join(_LANDMARK_BYTES), dtype=np.uint8)
+_PAT_OFFSETS = np.cumsum([0] + [len(b) for b in _LANDMARK_BYTES]).astype(np.int64)
+_PAT_CODES = np.array([_CITY_NAMES.index(v) for v in LANDMARK_TO_CITY.values()], dtype=np.int8)
+
+if _HAS_NUMBA:
+    @njit(cache=True, parallel=True)
+    def _tag_city_codes(buf, offsets, pat_buf, pat_offsets, pat_codes, out):
+        """Writes the matching city code per row (-1 when no landmark is found)."""
+        for i in prange(offsets.shape[0] - 1):
+            start = offsets[i]
+            end = offsets[i + 1]
+            code = np.int8(-1)
+            for p in range(pat_offsets.shape[0] - 1):
+                ps = pat_offsets[p]
+                plen = pat_offsets[p + 1] - ps
+                for j in range(start, end - plen + 1):
+                    k = 0
+                    while k < plen and buf[j + k] == pat_buf[ps + k]:
+                        k += 1
+                    if k == plen:
+                        code = pat_codes[p]
+                        break
+                if code >= 0:
+                    break
+            out[i] = code
+
+def _map_locations_numba(locations, default_city):
+    """Numba-backed landmark->city tagging over a flattened byte buffer."""
+    encoded = [str(v).strip().encode('utf-8') for v in locations.to_numpy()]
+    offsets = np.cumsum([0] + [len(b) for b in encoded]).astype(np.int64)
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    codes = np.empty(len(encoded), dtype=np.int8)
+    _tag_city_codes(buf, offsets, _PAT_BUF, _PAT_OFFSETS, _PAT_CODES, codes)
+    # Code -1 indexes the appended default entry.
+    cities = np.array(_CITY_NAMES + [default_city], dtype=object)
+    return pd.Series(cities[codes], index=locations.index)
+
+def _map_locations_ahocorasick(locations, default_city):
+    """Aho-Corasick landmark->city tagging: one automaton scan per location.
+
+    Matching stays case-sensitive, consistent with the other paths, and the
+    lowest-ranked (earliest dict entry) landmark wins when several match -
+    the automaton yields matches by end position, so the single scan still
+    collects them all before picking.
+    """
+    def tag(location):
+        best = None
+        for _, payload in _AC_AUTOMATON.iter(str(location).strip()):
+            if best is None or payload < best:
+                best = payload
+        return best[1] if best is not None else default_city
+    return pd.Series([tag(x) for x in locations.to_numpy()], index=locations.index)
+
+def _map_locations_to_cities(locations, default_city="Unknown"):
+    """Vectorized landmark->city mapping for a Series of location names.
+
+    Unmatched locations default to the selected city (when one is chosen),
+    otherwise 'Unknown' - same fallback as the old per-row helper.
+    Fastest available backend wins: numba kernel, then Aho-Corasick automaton,
+    then a vectorized pandas substring scan. All three apply the same
+    precedence: the earliest LANDMARK_TO_CITY entry wins on multi-matches.
+    """
+    if not default_city or default_city == "Select City...":
+        default_city = "Unknown"
+    if _HAS_NUMBA:
+        return _map_locations_numba(locations, default_city)
+    if _HAS_AHOCORASICK:
+        return _map_locations_ahocorasick(locations, default_city)
+    # One C-level contains pass per landmark, iterated in reverse so earlier
+    # dict entries overwrite later ones (a single regex alternation can't
+    # express pattern precedence - it resolves by leftmost match position).
+    stripped = locations.astype(str).str.strip()
+    cities = pd.Series(default_city, index=locations.index, dtype=object)
+    for landmark in reversed(LANDMARK_TO_CITY):
+        cities[stripped.str.contains(landmark, regex=False)] = LANDMARK_TO_CITY[landmark]
+    return cities
+
+# --- VISUALIZATION HELPERS ---
+
+# Figures reused across runs: creating a Figure (renderer, spines, tick
+# machinery, font-cache warmup) on every analysis is far more expensive than
+# clearing and redrawing an existing one. They are created on the first chart
+# render (matplotlib itself is lazily imported). Each figure has its own lock
+# since Streamlit sessions can rerun concurrently and matplotlib is not
+# thread-safe.
+_BAR_FIG = _BAR_AX = None
+_BAR_LOCK = threading.Lock()
+_PIE_FIG = _PIE_AX = None
+_PIE_LOCK = threading.Lock()
+_FIG_INIT_LOCK = threading.Lock()
+
+def _ensure_figures():
+    """Creates the two reusable figures on first use (checks _PIE_FIG, set last)."""
+    global _BAR_FIG, _BAR_AX, _PIE_FIG, _PIE_AX
+    if _PIE_FIG is None:
+        with _FIG_INIT_LOCK:
+            if _PIE_FIG is None:
+                # Fixed subplot params instead of per-render tight_layout():
+                # tight_layout runs an iterative constraint solver on every
+                # call, a large share of chart time for figures this small.
+                _BAR_FIG, _BAR_AX = plt.subplots(figsize=(8, 4))
+                _BAR_FIG.subplots_adjust(bottom=0.28, left=0.10, right=0.98, top=0.90)
+                _PIE_FIG, _PIE_AX = plt.subplots(figsize=(8, 4))
+                _PIE_FIG.subplots_adjust(bottom=0.05, left=0.25, right=0.75, top=0.88)
+
+def _fig_to_png_bytes(fig):
+    """Converts a Matplotlib figure to raw PNG bytes.
+
+    Renders through the Agg canvas and hands the raw RGBA buffer straight to
+    Pillow with zlib level 1: this skips savefig's full PngWriter pipeline and
+    its default compression level 6, which dominate chart generation time.
+    st.image accepts the bytes directly, so no base64 round-trip is needed.
+    """
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    img = Image.frombuffer('RGBA', (width, height), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+    buf = BytesIO()
+    img.save(buf, 'PNG', compress_level=1, optimize=False)
+    # No plt.close() here: the module-level figures are cleared and reused.
+    return buf.getvalue()
+
+# The chart helpers are cached on (city, dataset hash): rendering is by far
+# the slowest step in this module, so identical filtered data reuses the PNG
+# string outright. The leading-underscore Series arguments are excluded from
+# Streamlit's hasher - the cheap (city, data_hash) pair is the real key.
+@_cache_data(show_spinner=False)
+def _generate_bar_chart(city, data_hash, _top_locations):
+    """
+    Generates a bar chart for the top accident locations.
+    MODIFIED: Takes the precomputed top-5 Series from the fused aggregation
+    in _filter_and_summarize instead of re-grouping the DataFrame itself.
+    """
+    top_locations = _top_locations
+    if top_locations.empty: return b""
+
+    _ensure_figures()
+    with _BAR_LOCK:
+        _BAR_AX.clear()
+        top_locations.plot(kind='bar', ax=_BAR_AX, color='salmon')
+
+        _BAR_AX.set_title('Top 5 Accident Locations', fontsize=10)
+        _BAR_AX.set_ylabel('Accident Count', fontsize=8)
+        _BAR_AX.tick_params(axis='x', rotation=45, labelsize=7)
+        return _fig_to_png_bytes(_BAR_FIG)
+
+@_cache_data(show_spinner=False)
+def _generate_pie_chart(city, data_hash, _day_of_week_counts):
+    """Generates a pie chart for accidents by day of week from the precomputed per-day totals."""
+    day_of_week_counts = _day_of_week_counts
+    if day_of_week_counts.empty: return b""
+
+    _ensure_figures()
+    with _PIE_LOCK:
+        _PIE_AX.clear()
+        day_of_week_counts.plot(kind='pie', autopct='%1.1f%%', ax=_PIE_AX, startangle=90)
+        _PIE_AX.set_title('Accidents by Day of Week', fontsize=10)
+        _PIE_AX.set_ylabel('')
+        return _fig_to_png_bytes(_PIE_FIG)
+
+# dt.dayofweek code -> display name for the pie chart (0 = Monday).
+_DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# --- DATE FORMAT SNIFFING ---
+# Known date layouts, sniffed from the first value so the whole column goes
+# through pandas' fast C strptime path instead of per-element dateutil
+# auto-inference (the dominant cost of to_datetime without a format).
+_DATE_FORMATS = [
+    (re.compile(r"^\d{4}-\d{2}-\d{2}$"), "%Y-%m-%d"),
+    (re.compile(r"^\d{2}/\d{2}/\d{4}$"), "%d/%m/%Y"),
+    (re.compile(r"^\d{2}-\d{2}-\d{4}$"), "%d-%m-%Y"),
+]
+
+def _detect_date_format(dates):
+    """Returns the strptime format matching the first non-null date, or None."""
+    sample = dates.dropna().astype(str)
+    if not sample.empty:
+        value = sample.iloc[0].strip()
+        for pattern, fmt in _DATE_FORMATS:
+            if pattern.match(value):
+                return fmt
+    return None
+
+# --- CSV INGESTION ---
+# Only these columns ever feed the analysis; everything else in the CSV is
+# skipped at parse time via usecols.
+_ANALYSIS_COLUMNS = ['Location', 'Date', 'Time', 'City', 'accidents']
+
+def _read_accidents_csv(path):
+    """Reads the accidents CSV, preferring PyArrow's multithreaded SIMD parser.
+
+    Falls back to pandas' default C engine when pyarrow isn't installed;
+    usecols alone already skips parsing any columns the analysis never touches.
+    """
+    # Sniff the header first so usecols only names columns that actually exist
+    # (the CSV may or may not ship 'City', 'Time' or 'accidents').
+    header = pd.read_csv(path, nrows=0)
+    usecols = [c for c in _ANALYSIS_COLUMNS if c in header.columns]
+    # Date/Time must arrive as strings: pyarrow infers a uniformly clean
+    # HH:MM column as time32, and its datetime.time values all coerce to NaT
+    # in the downstream to_datetime(format=...) parses.
+    dtypes = {c: str for c in ('Date', 'Time') if c in usecols}
+    try:
+        return pd.read_csv(path, engine='pyarrow', usecols=usecols, dtype=dtypes)
+    except (ImportError, ValueError):
+        return pd.read_csv(path, usecols=usecols, dtype=dtypes)
+
+# --- CACHED LOAD + CLEAN PIPELINE ---
+def _clean(df, default_city):
+    """Precomputes the 'City' and 'Date' columns on a raw frame."""
+
+    # CRITICAL: Create 'City' column if missing for filtering (Silent Mapping)
+    if 'City' not in df.columns:
+        df['City'] = _map_locations_to_cities(df['Location'], default_city)
+
+    # Single assign/dropna chain: no inplace mutation, no column-by-column
+    # reassignment, so pandas never has to take defensive copies of slices.
+    # 'City' becomes a categorical so the per-run filter is an integer-code
+    # compare instead of a per-row string scan.
+    df = (
+        df.assign(
+            City=df['City'].astype(str).str.strip().astype('category'),
+            Date=pd.to_datetime(df['Date'], format=_detect_date_format(df['Date']),
+                                errors='coerce', cache=True),
+        )
+        .dropna(subset=['Location', 'Date'])
+    )
+
+    # Shrink dtypes: int32 halves the accident column's bandwidth through the
+    # groupbys, and a categorical Location drops per-string object overhead
+    # and takes the categorical groupby fast path. Location is only
+    # categorized when it is genuinely low-cardinality.
+    if 'accidents' in df.columns and pd.api.types.is_integer_dtype(df['accidents']):
+        df['accidents'] = df['accidents'].astype('int32')
+    if len(df) and df['Location'].nunique() / len(df) < 0.05:
+        df['Location'] = df['Location'].astype('category')
+    return df
+
+# Keyed by (path, mtime, default_city): re-parsing only happens when the CSV
+# actually changes on disk, not on every Streamlit rerun.
+@_cache_data(show_spinner=False)
+def _load_and_prepare(path, mtime, default_city):
+    """Loads the full dataset (Parquet cache when fresh, else CSV) and cleans it."""
+    if _parquet_cache_fresh(path):
+        try:
+            df_cached = pd.read_parquet(_parquet_cache_path(path))
+            if _cached_frame_ok(df_cached):
+                return _clean(df_cached, default_city)
+        except Exception:
+            pass  # unreadable/stale cache - fall through to the CSV
+    df = _read_accidents_csv(path)
+    try:
+        # Best-effort transcode so the next cold load skips CSV parsing.
+        df.to_parquet(_parquet_cache_path(path), compression='zstd', index=False)
+    except Exception:
+        pass  # no parquet engine available - keep serving from CSV
+    return _clean(df, default_city)
+
+if _HAS_PYARROW:
+    @_cache_data(show_spinner=False)
+    def _load_filtered(path, mtime, selected_city):
+        """Streams the CSV in 8 MB blocks, keeping only the selected city's rows.
+
+        Peak memory stays bounded by one block plus the surviving rows instead
+        of the whole file, and every later pandas op touches only the filtered
+        subset.
+        """
+        if _parquet_cache_fresh(path):
+            try:
+                table = pa_pq.read_table(_parquet_cache_path(path))
+                if _parquet_schema_ok(table.schema):
+                    filtered = table.filter(_arrow_city_mask(table, selected_city))
+                    return _clean(filtered.to_pandas(), selected_city)
+            except Exception:
+                pass  # unreadable/stale cache - fall through to the CSV
+
+        # Date/Time pinned to string for the same reason as the pandas
+        # reader: inferred time32/date32 values break the downstream
+        # to_datetime(format=...) parses, and the tee below would persist
+        # that broken schema into the Parquet cache.
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=8 * 1024 * 1024),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={'Date': pa.string(), 'Time': pa.string()}))
+        parts = []
+        # Tee the raw batches into a Parquet cache during this same pass, so
+        # the next cold load skips CSV parsing entirely. Written to a temp
+        # file and renamed on success to avoid serving a half-written cache.
+        cache_path = _parquet_cache_path(path)
+        tmp_path = cache_path + '.tmp'
+        try:
+            writer = pa_pq.ParquetWriter(tmp_path, reader.schema, compression='zstd')
+        except Exception:
+            writer = None
+        try:
+            for batch in reader:
+                if writer is not None:
+                    writer.write_batch(batch)
+                filtered = batch.filter(_arrow_city_mask(batch, selected_city))
+                if filtered.num_rows:
+                    parts.append(filtered)
+            if writer is not None:
+                writer.close()
+                writer = None
+                os.replace(tmp_path, cache_path)
+        finally:
+            if writer is not None:
+                writer.close()
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        df = pa.Table.from_batches(parts, schema=reader.schema).to_pandas()
+        return _clean(df, selected_city)
+
+    def _parquet_schema_ok(schema):
+        """Arrow-side counterpart of _cached_frame_ok (no pandas round-trip)."""
+        for col in ('Date', 'Time'):
+            if col in schema.names and not pa.types.is_string(schema.field(col).type):
+                return False
+        return True
+
+    def _arrow_city_mask(batch, selected_city):
+        """Boolean mask selecting the given city's rows in a batch or table."""
+        if 'City' in batch.schema.names:
+            # Trim/lower/compare entirely in Arrow's C++ kernels over the
+            # contiguous UTF-8 buffers - no per-row Python objects. Lowering
+            # both sides keeps the old case-insensitive filter semantics.
+            city_col = pc.utf8_lower(
+                pc.utf8_trim_whitespace(pc.cast(batch.column('City'), pa.string())))
+            return pc.equal(city_col, selected_city.lower())
+        # No City column in the data: tag the locations with the shared
+        # (regex/numba) mapper, defaulting to the city being filtered for -
+        # same semantics as the full-load path.
+        cities = _map_locations_to_cities(
+            batch.column('Location').to_pandas(), selected_city)
+        return pa.array(cities.to_numpy() == selected_city)
+
+# --- CORE ANALYSIS FUNCTION (Modified to accept file path) ---
+def analyze_accident_data(data_source):
+    """Analyzes historical accident data, accepting a file path."""
+
+    selected_city = st.session_state.get('selected_city')
+    if not selected_city or selected_city == "Select City...":
+        return "Error: Cannot analyze data. Please select a City on the main dashboard first.", None
+
+    _ensure_heavy_imports()
+
+    try:
+        # Load Data from fixed file path (cached across reruns via mtime key)
+        if isinstance(data_source, str) and os.path.exists(data_source):
+            mtime = os.path.getmtime(data_source)
+        else:
+             return "Error: Fixed CSV file not found or path is incorrect. Ensure 'accidents.csv' is in the root directory.", None
+
+        return _filter_and_summarize(data_source, mtime, selected_city)
+
+    except Exception as e:
+        return f"An unexpected error occurred during analysis: {e}", None
+
+@_cache_data(show_spinner=False)
+def _filter_and_summarize(path, mtime, selected_city):
+    """Filters the prepared DataFrame by city and compiles the analytics summary (cached per city + file version)."""
+
+    if _HAS_PYARROW:
+        # Streamed load: only the selected city's rows ever reach pandas.
+        df = _load_filtered(path, mtime, selected_city)
+    else:
+        df = _load_and_prepare(path, mtime, selected_city)
+
+    if df.empty:
+        return f"Error: No accident data found in the CSV for the selected city: {selected_city}.", None
+
+    # 1. Filter the DataFrame by the selected city: equality on the categorical
+    # codes rather than a regex contains-scan over every row. The category
+    # lookup lowers both sides so it agrees with the case-insensitive Arrow
+    # pre-filter (a CSV storing "HYDERABAD" still matches the selectbox's
+    # "Hyderabad"); categories are few, so the Python scan over them is free.
+    target = selected_city.lower()
+    city_codes = [code for code, cat in enumerate(df['City'].cat.categories)
+                  if str(cat).lower() == target]
+    if not city_codes:
+        # Selected city never appears in the data - nothing to analyze.
+        return f"Error: No accident data found in the CSV for the selected city: {selected_city}.", None
+    df_filtered = df.loc[df['City'].cat.codes.isin(city_codes)]
+
+    if df_filtered.empty:
+        return f"Error: No accident data found in the CSV for the selected city: {selected_city}.", None
+
+    # 2. Proceed with Analysis on the FILTERED DataFrame (df_filtered)
+
+    # --- FUSED AGGREGATION ---
+    # One grouped sum over (Location, DayOfWeek[, Hour]); every summary and
+    # both charts are derived from this single table instead of each doing
+    # its own full-column pass over df_filtered.
+    # Day of week is grouped as dt.dayofweek int codes - no full object-dtype
+    # name column is ever materialized; the codes become names only on the
+    # 7-row aggregate feeding the pie chart.
+    day_codes = df_filtered['Date'].dt.dayofweek.rename('DayOfWeek')
+    group_keys = ['Location', day_codes]
+    has_hour = 'Time' in df_filtered.columns
+    if has_hour:
+        # .assign instead of writing into the boolean-indexed slice, which
+        # would trigger SettingWithCopyWarning and a defensive copy.
+        df_filtered = df_filtered.assign(
+            Hour=pd.to_datetime(df_filtered['Time'], format='%H:%M', errors='coerce',
+                                cache=True).dt.hour
+        )
+        group_keys.append('Hour')
+
+    grouped = df_filtered.groupby(group_keys, observed=True, sort=False, dropna=False)
+    if 'accidents' in df_filtered.columns:
+        agg = grouped['accidents'].sum()
+    else:
+        # Fallback: count rows if the accident count column is missing
+        agg = grouped.size()
+
+    # sort=False throughout: idxmax/nlargest don't need key-sorted output, and
+    # nlargest(5) is an argpartition-backed partial sort rather than a full one.
+    location_totals = agg.groupby(level='Location', sort=False).sum()
+    high_risk_zone = location_totals.idxmax()
+    total_accidents = agg.sum()
+
+    peak_time_str = "N/A (Time data missing in CSV)"
+    if has_hour:
+        # NaN hours (unparseable Time values) drop out of this level-groupby
+        hour_totals = agg.groupby(level='Hour', sort=False).sum()
+        if not hour_totals.empty:
+            peak_hour = int(hour_totals.idxmax())
+            peak_time_str = f"{peak_hour}:00 - {peak_hour + 1}:00"
+
+    # 3. Generate Visualizations (fed from the precomputed aggregation).
+    # A stable content hash of the filtered rows keys the chart caches, so an
+    # unchanged dataset reuses the rendered PNGs even across cache entries.
+    # 'accidents' is part of the hash when present: the charts plot its sums,
+    # so a count-only CSV edit must invalidate the rendered PNGs too.
+    hash_cols = ['Location', 'Date']
+    if 'accidents' in df_filtered.columns:
+        hash_cols.append('accidents')
+    data_hash = hashlib.blake2b(
+        pd.util.hash_pandas_object(df_filtered[hash_cols], index=False).values.tobytes()
+    ).hexdigest()
+    # The two renders are independent and Agg releases the GIL in its C paths,
+    # so overlap them; each chart has its own figure and lock (see above).
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        bar_future = executor.submit(
+            _generate_bar_chart, selected_city, data_hash, location_totals.nlargest(5))
+        pie_future = executor.submit(
+            _generate_pie_chart, selected_city, data_hash,
+            agg.groupby(level='DayOfWeek').sum().rename(index=dict(enumerate(_DAY_NAMES))))
+        bar_chart_png = bar_future.result()
+        pie_chart_png = pie_future.result()
+
+    # 4. Compile Results
+    analytics_data = {
+        "high_risk_zone": high_risk_zone,
+        "peak_time": peak_time_str,
+        "total_accidents": total_accidents,
+        "charts": {
+            "bar_chart": bar_chart_png,
+            "pie_chart": pie_chart_png
+        },
+        "city": selected_city
+    }
+    return analytics_data, df_filtered
+
+# --- STREAMLIT MODULE FUNCTION (AUTO-RUN) ---
+# NOTE: This function remains the same as it correctly handles caching and display flow
+def analytics_module():
+    """Triggers the analysis immediately using the fixed CSV file."""
+    
+    st.markdown(f"**Data Source:** :green[Pre-loaded] from `{FIXED_CSV_PATH}`")
+    
+    # 1. Check if City is selected
+    selected_city = st.session_state.get('selected_city')
+    if not selected_city or selected_city == "Select City...":
+        st.info("Please select a City on the main dashboard to run Module 2.")
+        return
+
+    # Initialize data and status message variables
+    data = None
+    run_status_message = None
+
+    # 2. Check and Run/Cache Analysis
+    if st.session_state.get('analytics_data') and st.session_state['analytics_data'].get('city') == selected_city:
+        # Data is cached, no re-run needed
+        data = st.session_state['analytics_data']
+        run_status_message = f"✅ Data Analysis Complete! Results for {selected_city} loaded from cache."
+    else:
+        # Auto-Run Analysis
+        with st.spinner(f'Analyzing background CSV data for {selected_city}...'):
+            analytics_data, df_raw = analyze_accident_data(FIXED_CSV_PATH)
+            
+            if isinstance(analytics_data, dict) and 'high_risk_zone' in analytics_data:
+                st.session_state['analytics_data'] = analytics_data
+                data = analytics_data
+                run_status_message = f"✅ Data Analysis Complete! Results for {selected_city}."
+            else:
+                st.error(f"Module 2 Error: {analytics_data}")
+                return # Stop if analysis failed
+
+    # 3. Display Results 
+    if data:
+        st.success(run_status_message) # Show the single, consolidated status message
+        
+        st.subheader("Key Risk Insights")
+        st.markdown(f"* **High-Risk Zone:** :red[{data['high_risk_zone']}]")
+        st.markdown(f"* **Total Accidents Analyzed:** {data['total_accidents']}")
+        st.markdown(f"* **Peak Accident Time:** {data['peak_time']}")
+        
+        st.subheader("📊 Visualizations")
+        chart_col1, chart_col2 = st.columns(2)
+        
+        if data['charts']['bar_chart']:
+            chart_col1.image(data['charts']['bar_chart'])
+            chart_col1.caption(f"Top 5 Accident Locations in {data['city']}")
+
+        if data['charts']['pie_chart']:
+            chart_col2.image(data['charts']['pie_chart'])
+            chart_col2.caption("Accidents by Day of Week")
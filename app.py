@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-# Import the main functions from your module files. 
+# Import the main functions from your module files.
 # These must match the function names defined in your individual .py files.
 from vision_gemini import vision_module
 from analytics import analytics_module
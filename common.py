@@ -0,0 +1,27 @@
+import streamlit as st
+
+# --- Shared Helper Function ---
+# Lives in its own module so every caller (vision, complaint, future modules)
+# resolves the SAME cached function object: @st.cache_resource keys on the
+# function, so duplicate per-module copies would each build their own client.
+@st.cache_resource(show_spinner=False)
+def get_gemini_client():
+    """Initializes and returns the Gemini client from Streamlit secrets.
+
+    Cached as a resource singleton: the client is a long-lived, thread-safe
+    network handle, so it is built once per process instead of on every
+    Streamlit rerun (which happens on every widget interaction).
+    """
+    try:
+        # Check for API key in Streamlit secrets
+        api_key = st.secrets.get("gemini_api", {}).get("key")
+        if not api_key:
+            return None
+        # Deferred import: the SDK drags in a large proto/auth stack, and
+        # thanks to the resource cache this body runs once per process.
+        from google import genai
+        client = genai.Client(api_key=api_key)
+        return client
+    except Exception:
+        # Handles case where the genai library might fail to initialize
+        return None
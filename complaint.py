@@ -1,43 +1,52 @@
 import streamlit as st
-import base64
 import urllib.parse
+from string import Template
 # Ensure you have your Gemini client imports if you are using the model here
 # from google import genai
 # import os 
 
-# --- HELPER FUNCTION: DOWNLOAD BUTTON ---
-def get_download_link(text, filename="Civic_Complaint_Letter.txt", link_text="Download Complaint Letter"):
-    """Generates a downloadable link for the given text content."""
-    b64 = base64.b64encode(text.encode()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}" style="display: inline-block; padding: 10px 20px; background-color: #2F88D9; color: white; text-align: center; text-decoration: none; border-radius: 5px; font-weight: bold;">{link_text}</a>'
-    return href
-
 # --- HELPER FUNCTION: SEND EMAIL BUTTON (mailto) ---
 def get_mailto_link(recipient, subject, body, button_text="Send Email"):
-    """Generates a mailto link that opens the user's default email client."""
-    
-    # URL encode the subject and body to handle special characters
-    encoded_subject = urllib.parse.quote(subject)
-    encoded_body = urllib.parse.quote(body)
-    
-    # Construct the mailto URI
-    mailto_uri = f"mailto:{recipient}?subject={encoded_subject}&body={encoded_body}"
-    
+    """Generates a mailto link that opens the user's default email client.
+
+    URL-quoting a multi-kilobyte letter body is per-character Python work that
+    was re-done on every rerun (and twice via the persistent-display branch),
+    so the built URI is cached in session state keyed on its inputs. Only the
+    last few entries are kept to avoid session-state bloat.
+    """
+    cache = st.session_state.setdefault('_mailto_cache', {})
+    key = hash((recipient, subject, body))
+    mailto_uri = cache.get(key)
+    if mailto_uri is None:
+        # URL encode the subject and body to handle special characters
+        encoded_subject = urllib.parse.quote(subject)
+        encoded_body = urllib.parse.quote(body)
+
+        # Construct the mailto URI
+        mailto_uri = f"mailto:{recipient}?subject={encoded_subject}&body={encoded_body}"
+        cache[key] = mailto_uri
+        while len(cache) > 4:
+            # Evict oldest-inserted entries (dicts preserve insertion order)
+            cache.pop(next(iter(cache)))
+
     # Create the link (will be rendered as a blue button via Streamlit Markdown/HTML)
     link = f'<a href="{mailto_uri}" target="_blank" style="display: inline-block; padding: 10px 20px; background-color: #4CAF50; color: white; text-align: center; text-decoration: none; border-radius: 5px; font-weight: bold;">{button_text}</a>'
     return link
 
 
-def generate_final_letter(subject, body, analytics_data):
-    """
-    Generates the final formal letter, displays it, and shows action buttons.
-    """
-    # 1. Generate the content (Placeholder for actual Gemini Call)
-    # -----------------------------------------------------------------------------------
-    city = analytics_data.get('city', 'Local City')
-    
-    # Use the edited subject and body for the final template
-    final_letter_content = f"""
+# Memoized on (subject, body, city): these rarely change between reruns, but
+# every widget click (e.g. the email-confirm button) re-executes this module.
+# If this placeholder is ever swapped for a real Gemini call, the cache will
+# also prevent re-billing for identical inputs. When that happens, prefer the
+# streaming API on a cache miss - client.models.generate_content_stream(...)
+# rendered via st.write_stream(chunk.text for chunk in stream) - so the first
+# tokens appear in hundreds of ms instead of after the full generation;
+# accumulate the streamed text and store it here so cached reruns replay the
+# finished letter instantly.
+# Compiled once at import: Template.substitute does a single regex pass over
+# the pre-parsed template instead of rebuilding the multi-line literal with
+# inline interpolation on every compose.
+_LETTER_TPL = Template("""
 [Your Name/Organization Name - e.g., A Concerned Resident]
 [Your Address]
 [Your City, Postal Code]
@@ -48,18 +57,56 @@ December 06, 2025
 
 The Commissioner
 Municipal Corporation
-{city}
+$city
 
-SUBJECT: {subject}
+SUBJECT: $subject
 
 Respected Commissioner,
-{body}
+$body
 
 Sincerely,
 A Concerned Resident
-"""
-    # -----------------------------------------------------------------------------------
-    
+""")
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _compose_letter(subject, body, city):
+    """Composes the final formal letter text (Placeholder for actual Gemini Call)."""
+    return _LETTER_TPL.substitute(subject=subject, body=body, city=city)
+
+# --- HELPER: EMAIL CONFIRMATION (isolated rerun scope) ---
+def _email_confirm_block(key):
+    """Renders the simulated email-sent confirmation button."""
+    # This button simulates the successful action after the user sends the email externally
+    if st.button("Email Sent Successfully (Click to Confirm)", key=key, type="primary"):
+        st.balloons()
+        st.toast('Email sent successfully!', icon='📧')
+        st.success("🎉 Email Sent Successfully! Thank you for your civic contribution.")
+
+# st.fragment (Streamlit >= 1.33) makes the confirm click rerun only this
+# block instead of the whole complaint module - no form rebuild, no mailto
+# URI or letter re-composition just to show balloons. Older Streamlit falls
+# back to the plain function (full rerun, previous behavior).
+if hasattr(st, 'fragment'):
+    _email_confirm_block = st.fragment(_email_confirm_block)
+
+
+def generate_final_letter(subject, body, analytics_data):
+    """
+    Generates the final formal letter, displays it, and shows action buttons.
+    """
+    # 1. Generate the content. A session-state hash gate short-circuits the
+    # hot rerun path (every widget click re-enters here): when the inputs are
+    # unchanged, even the st.cache_data lookup is skipped and the previously
+    # composed letter is reused directly.
+    city = analytics_data.get('city', 'Local City')
+    letter_key = hash((subject, body, city))
+    if (st.session_state.get('_letter_key') == letter_key
+            and st.session_state.get('final_letter_content')):
+        final_letter_content = st.session_state['final_letter_content']
+    else:
+        final_letter_content = _compose_letter(subject, body, city)
+        st.session_state['_letter_key'] = letter_key
+
     # Save the final content to session state
     st.session_state['final_letter_content'] = final_letter_content
     
@@ -90,18 +137,20 @@ A Concerned Resident
         )
         st.markdown(mailto_html, unsafe_allow_html=True)
     
-    # 3b. Download Button
+    # 3b. Download Button (native widget: Streamlit streams the payload
+    # lazily instead of re-embedding a base64 data-URI in the DOM per rerun)
     with col_download:
-        # Use the download link helper
-        st.markdown(get_download_link(final_letter_content, link_text="Download"), unsafe_allow_html=True)
+        st.download_button(
+            "Download",
+            data=final_letter_content,
+            file_name="Civic_Complaint_Letter.txt",
+            mime="text/plain",
+            key="dl_letter"
+        )
 
-    # 3c. Email Confirmation Button (Simulated Popup)
+    # 3c. Email Confirmation Button (Simulated Popup, isolated fragment)
     with col_confirm:
-        # This button simulates the successful action after the user sends the email externally
-        if st.button("Email Sent Successfully (Click to Confirm)", key="email_confirm", type="primary"):
-            st.balloons()
-            st.toast('Email sent successfully!', icon='📧')
-            st.success("🎉 Email Sent Successfully! Thank you for your civic contribution.")
+        _email_confirm_block("email_confirm")
 
 
 # --- STREAMLIT MODULE FUNCTION ---
@@ -127,8 +176,10 @@ def complaint_module():
     # Auto-Generated Subject
     subject_text = f"URGENT: Hazardous Road Conditions (Potholes: {potholes_count}) on {high_risk_zone} ({city})"
     
-    # Auto-Generated Complaint Body
-    complaint_body_text = f"""
+    # Auto-Generated Complaint Body: prefer the draft produced by Module 1's
+    # one-shot analysis (hazards + letter in a single Gemini round-trip).
+    draft_letter = st.session_state.get('draft_letter')
+    complaint_body_text = draft_letter if draft_letter else f"""
 This letter serves to formally report critical road hazards observed on {high_risk_zone} in {city}.
 
 Visual Findings:
@@ -207,10 +258,13 @@ We urge the Municipal Corporation to prioritize the repair of this section.
             st.markdown(mailto_html, unsafe_allow_html=True)
         
         with col_download:
-            st.markdown(get_download_link(st.session_state['final_letter_content'], link_text="Download"), unsafe_allow_html=True)
+            st.download_button(
+                "Download",
+                data=st.session_state['final_letter_content'],
+                file_name="Civic_Complaint_Letter.txt",
+                mime="text/plain",
+                key="dl_letter_cached"
+            )
 
         with col_confirm:
-            if st.button("Email Sent Successfully (Click to Confirm)", key="email_confirm_cached", type="primary"):
-                st.balloons()
-                st.toast('Email sent successfully!', icon='📧')
-                st.success("🎉 Email Sent Successfully! Thank you for your civic contribution.")
+            _email_confirm_block("email_confirm_cached")
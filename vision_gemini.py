@@ -1,192 +1,454 @@
-import streamlit as st
-from google import genai
-from google.genai import types
-from PIL import Image
-import io
-import json
-import base64 
-
-# --- Helper Function (Shared across modules) ---
-def get_gemini_client():
-    """Initializes and returns the Gemini client from Streamlit secrets."""
-    try:
-        # Check for API key in Streamlit secrets
-        api_key = st.secrets.get("gemini_api", {}).get("key")
-        if not api_key:
-            return None
-        client = genai.Client(api_key=api_key)
-        return client
-    except Exception:
-        # Handles case where the genai library might fail to initialize
-        return None
-
-# --- Core Logic Function ---
-def analyze_image_with_gemini(uploaded_file, client: genai.Client):
-    """
-    Analyzes image using Gemini 2.5 Flash to detect hazards and returns structured data.
-    """
-    if not client:
-        return {"error": "Gemini client not initialized."}, None
-
-    # 1. Prepare the Image
-    try:
-        # CRITICAL: For uploaded files or camera input (bytes), we use io.BytesIO
-        uploaded_file.seek(0)
-        image_bytes = uploaded_file.read()
-        
-        # Open with PIL for the API call.
-        img = Image.open(io.BytesIO(image_bytes))
-        
-    except Exception as e:
-        return {"error": f"Failed to process image file: {e}"}, None
-
-    # 2. Define Prompt and Structured Output
-    system_instruction = (
-        "You are an expert road safety AI analyst. Inspect the image and count infrastructure hazards. "
-        "Estimate the location based on visual cues. Output your analysis STRICTLY in JSON format. "
-        "Only count visible potholes, broken streetlights, or large road cracks."
-    )
-    prompt = "Analyze this image for road defects and provide hazard counts and a short summary."
-
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        response_mime_type="application/json",
-        response_schema={
-            "type": "object",
-            "properties": {
-                "location_estimate": {"type": "string"},
-                "potholes": {"type": "integer"},
-                "broken_lights": {"type": "integer"},
-                "large_cracks": {"type": "integer"},
-                "ai_confidence_summary": {"type": "string"}
-            },
-            "required": ["location_estimate", "potholes", "broken_lights", "large_cracks", "ai_confidence_summary"]
-        }
-    )
-
-    # 3. Make the API Call
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[prompt, img], # Using the PIL Image object 'img'
-            config=config
-        )
-        hazard_data = json.loads(response.text)
-        
-        # Standardize keys for st.session_state
-        final_output = {
-            "potholes": hazard_data.get("potholes", 0) + hazard_data.get("large_cracks", 0), # Combine cracks and potholes for simplicity
-            "broken_lights": hazard_data.get("broken_lights", 0),
-            "location": hazard_data.get("location_estimate", "Location Unknown"),
-            "summary": hazard_data.get("ai_confidence_summary", "Analysis complete.")
-        }
-        return final_output, response.text
-        
-    except Exception as e:
-        # Include response text in error if available
-        error_text = getattr(response, 'text', 'N/A') if 'response' in locals() else 'N/A'
-        return {"error": f"Gemini API error: {e}. Raw response: {error_text}"}, None
-
-
-# --- Streamlit Module Function (CALLED BY app.py) ---
-def vision_module():
-    """
-    Renders the Visual Intelligence Module UI, using a toggle button to control 
-    when the camera input is displayed.
-    """
-    
-    # 1. Initialize Gemini Client and Camera State
-    client = get_gemini_client()
-    if not client:
-        st.error("Cannot run Module 1. Please ensure your Gemini API Key is in `.streamlit/secrets.toml`.")
-        return
-    
-    # Initialize the camera visibility state
-    if 'show_camera' not in st.session_state:
-        st.session_state.show_camera = False
-
-    st.subheader("1️⃣ Capture or Upload Hazard Image")
-
-    # --- 2. INPUT SELECTION ---
-    
-    input_col1, input_col2 = st.columns(2)
-
-    with input_col1:
-        # Option 2: File Upload (Always visible)
-        uploaded_file = st.file_uploader("📂 Upload an Image File", type=['png', 'jpg', 'jpeg'])
-
-    with input_col2:
-        # Toggle Button: Controls the visibility of the camera input
-        if st.button("📸 Open Camera for Live Capture", key="camera_toggle", use_container_width=True):
-            # Toggle the state. This triggers a rerun.
-            st.session_state.show_camera = not st.session_state.show_camera
-
-    # 3. Conditional Camera Input (Only displayed if show_camera is True)
-    camera_image = None
-    if st.session_state.show_camera:
-        # st.camera_input widget only renders when this block executes
-        camera_image = st.camera_input("Capture Road Hazard Now", key="live_camera_input")
-        
-        # If the user captures an image, the widget returns the image. 
-        # If the user clicks 'Clear photo', it returns None. We'll rely on the image being set.
-
-
-    # --- 4. ANALYSIS LOGIC ---
-    
-    # Determine which file to analyze
-    file_to_analyze = None
-    if camera_image is not None:
-        file_to_analyze = camera_image
-    elif uploaded_file is not None:
-        file_to_analyze = uploaded_file
-
-    if file_to_analyze is not None:
-        # Display the file
-        source_type = 'Camera' if camera_image else 'Upload'
-        st.image(file_to_analyze, caption=f"Image Source: {source_type}", width=400)
-        
-        # --- Analysis Trigger Button ---
-        if st.button("Analyze for Hazards (Module 1)", use_container_width=True, key="run_vision_analysis"):
-            
-            with st.spinner("Analyzing image with Gemini Vision..."):
-                # Pass the file object to the core function
-                hazard_data, raw_response = analyze_image_with_gemini(file_to_analyze, client)
-                
-            if "error" in hazard_data:
-                st.error(f"Analysis Error: {hazard_data['error']}")
-            else:
-                st.success("✅ Hazard Detection Complete!")
-                
-                # --- CRITICAL: Save to Session State ---
-                st.session_state['hazard_data'] = hazard_data
-                st.session_state['image_processed'] = True # Mark as processed
-                
-                # --- Display Results ---
-                st.subheader("Results Summary")
-                
-                col_pothole, col_light = st.columns(2)
-                
-                col_pothole.metric(
-                    label="Potholes/Cracks Detected", 
-                    value=hazard_data.get('potholes', 0)
-                )
-                col_light.metric(
-                    label="Broken Lights", 
-                    value=hazard_data.get('broken_lights', 0)
-                )
-                
-                st.markdown(f"**Location Estimate:** {hazard_data.get('location')}")
-                st.markdown(f"**AI Summary:** *{hazard_data.get('summary')}*")
-                st.warning("💡 Now proceed to **Module 2: Data Analytics** to run the historical risk assessment.")
-
-    elif st.session_state.get('image_processed'):
-        # Show cached results if a file was previously processed
-        hazard_data = st.session_state['hazard_data']
-        st.info("Cached Visual Analysis Found. Upload or capture a new image to re-run.")
-        
-        st.subheader("Results Summary (Cached)")
-        col_pothole, col_light = st.columns(2)
-        col_pothole.metric(label="Potholes/Cracks Detected", value=hazard_data.get('potholes', 0))
-        col_light.metric(label="Broken Lights", value=hazard_data.get('broken_lights', 0))
-        st.markdown(f"**Location Estimate:** {hazard_data.get('location')}")
-        st.markdown(f"**AI Summary:** *{hazard_data.get('summary')}*")
+import streamlit as st
+# google.genai (and PIL) are imported lazily inside the functions that need
+# them: Streamlit re-executes this script top-to-bottom on every rerun, and
+# the SDK's proto/auth stack is a large cold-start cost for users who never
+# trigger a Gemini call.
+import hashlib
+
+# Shared cached client lives in common.py so every module hits the same
+# @st.cache_resource entry.
+from common import get_gemini_client
+
+# --- Prompt and Structured Output (module constants) ---
+# Bump PROMPT_VERSION whenever the prompt/schema changes: it is part of the
+# vision-cache key, so edits invalidate previously memoized responses.
+PROMPT_VERSION = "v1"
+
+SYSTEM_INSTRUCTION = (
+    "You are an expert road safety AI analyst. Inspect the image and count infrastructure hazards. "
+    "Estimate the location based on visual cues. Output your analysis STRICTLY in JSON format. "
+    "Only count visible potholes, broken streetlights, or large road cracks."
+)
+PROMPT = "Analyze this image for road defects and provide hazard counts and a short summary."
+
+HAZARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "location_estimate": {"type": "string"},
+        "potholes": {"type": "integer"},
+        "broken_lights": {"type": "integer"},
+        "large_cracks": {"type": "integer"},
+        "ai_confidence_summary": {"type": "string"}
+    },
+    "required": ["location_estimate", "potholes", "broken_lights", "large_cracks", "ai_confidence_summary"]
+}
+
+# One-shot pipeline: ask for the hazard report AND a complaint-letter draft in
+# a single request, collapsing the two dependent round-trips (Module 1 vision
+# call, then Module 3 letter generation) into one.
+FULL_REPORT_PROMPT = (
+    "Analyze this image for road defects. First produce the hazard report, "
+    "then draft a short formal complaint-letter body describing the observed "
+    "hazards, addressed to the municipal commissioner."
+)
+
+FULL_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hazard_report": HAZARD_SCHEMA,
+        "complaint_letter": {"type": "string"}
+    },
+    "required": ["hazard_report", "complaint_letter"]
+}
+
+# --- On-disk response cache (L2) ---
+# st.cache_data is per-process: a server restart (routine on free-tier hosts)
+# wipes it and re-bills every repeated image. When diskcache is installed,
+# responses are also persisted on disk keyed identically (content hash +
+# prompt version), so the warm cache survives restarts. Optional dependency.
+try:
+    from diskcache import Cache
+    _DISK_CACHE = Cache('./.gemini_cache', size_limit=int(1e9))
+except ImportError:
+    _DISK_CACHE = None
+
+_DISK_CACHE_TTL = 7 * 24 * 3600
+
+def _disk_cache_get(key):
+    if _DISK_CACHE is None:
+        return None
+    try:
+        return _DISK_CACHE.get(key)
+    except Exception:
+        return None  # corrupt/locked cache - behave as a miss
+
+def _disk_cache_set(key, value):
+    if _DISK_CACHE is None:
+        return
+    try:
+        _DISK_CACHE.set(key, value, expire=_DISK_CACHE_TTL)
+    except Exception:
+        pass  # cache write failure is never fatal
+
+# --- Gemini Context Cache ---
+@st.cache_resource(ttl=45 * 60, show_spinner=False)
+def _get_vision_context_cache():
+    """Registers the fixed system instruction as Gemini cached content.
+
+    The instruction block is identical on every vision call, so caching it
+    server-side (1 h TTL) avoids re-uploading and re-tokenizing it each time.
+    The resource cache's 45 min TTL re-creates it before the server copy
+    expires. Returns the cache name, or None when context caching is
+    unavailable (older SDK, unsupported model, or prompt below the minimum
+    cacheable size) - callers then fall back to inline instructions.
+    """
+    client = get_gemini_client()
+    if not client:
+        return None
+    try:
+        from google.genai import types
+        cache = client.caches.create(
+            model='gemini-2.5-flash',
+            config=types.CreateCachedContentConfig(
+                system_instruction=SYSTEM_INSTRUCTION,
+                ttl='3600s',
+            ),
+        )
+        return cache.name
+    except Exception:
+        return None
+
+def _compact_image_bytes(image_bytes):
+    """Downscales oversized captures before they are sent to Gemini.
+
+    Phone photos and camera captures are routinely 3-12 MP, but ~1280 px is
+    plenty for counting potholes, and both upload time and inline-image token
+    cost scale with pixel count. Returns (bytes, mime) - already-small images
+    pass through untouched with mime None so the caller's own detection runs.
+    """
+    if len(image_bytes) < 400_000:
+        return image_bytes, None
+    try:
+        import io
+        from PIL import Image
+        img = Image.open(io.BytesIO(image_bytes))
+        img.thumbnail((1280, 1280), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.convert('RGB').save(buf, format='JPEG', quality=85, optimize=True)
+        return buf.getvalue(), 'image/jpeg'
+    except Exception:
+        # Undecodable input - send it as-is and let the API complain.
+        return image_bytes, None
+
+def _camera_png_to_jpeg(image_bytes):
+    """Transcodes a camera capture from PNG to JPEG before upload.
+
+    st.camera_input always delivers PNG, which for a photographic frame is
+    typically 5-10x larger on the wire than JPEG at quality 90 with no
+    visible loss. Returns (bytes, mime); non-PNG or undecodable input passes
+    through unchanged with mime None.
+    """
+    if not image_bytes.startswith(b'\x89PNG'):
+        return image_bytes, None
+    try:
+        import io
+        from PIL import Image
+        img = Image.open(io.BytesIO(image_bytes))
+        buf = io.BytesIO()
+        img.convert('RGB').save(buf, format='JPEG', quality=90, optimize=True)
+        return buf.getvalue(), 'image/jpeg'
+    except Exception:
+        return image_bytes, None
+
+def _sniff_mime(image_bytes):
+    """First-byte mime sniff for inputs that don't expose a content type."""
+    if image_bytes.startswith(b'\x89PNG'):
+        return 'image/png'
+    return 'image/jpeg'
+
+# --- Core Logic Function ---
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def _gemini_vision_call(img_hash, _image_bytes, mime_type, prompt_version):
+    """Runs the Gemini vision analysis, memoized on the image content hash.
+
+    Re-analyzing an identical image returns instantly from cache instead of
+    paying the multi-second network/inference round-trip (and its API cost)
+    again. img_hash + prompt_version form the key; the raw bytes are passed
+    with a leading underscore so Streamlit's hasher skips them. Failures
+    raise so errors are never cached. st.cache_data is the in-memory L1;
+    diskcache (when installed) is the restart-surviving L2.
+    """
+    disk_key = ('vision', img_hash, prompt_version)
+    cached = _disk_cache_get(disk_key)
+    if cached is not None:
+        return cached
+
+    client = get_gemini_client()
+    from google.genai import types
+
+    # Reference the server-side cached system instruction when available;
+    # only the per-call prompt and image go over the wire then.
+    cache_name = _get_vision_context_cache()
+    if cache_name:
+        config = types.GenerateContentConfig(
+            cached_content=cache_name,
+            response_mime_type="application/json",
+            response_schema=HAZARD_SCHEMA
+        )
+    else:
+        config = types.GenerateContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            response_mime_type="application/json",
+            response_schema=HAZARD_SCHEMA
+        )
+
+    # Raw bytes with an explicit mime type: no PIL decode to an RGB buffer
+    # and no SDK-side re-encode - the original compressed image goes straight
+    # over the wire.
+    image_part = types.Part.from_bytes(data=_image_bytes, mime_type=mime_type)
+
+    try:
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=[PROMPT, image_part],
+            config=config
+        )
+    except Exception:
+        if not cache_name:
+            raise
+        # The server-side cache may have expired mid-flight - retry inline.
+        config = types.GenerateContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            response_mime_type="application/json",
+            response_schema=HAZARD_SCHEMA
+        )
+        response = client.models.generate_content(
+            model='gemini-2.5-flash',
+            contents=[PROMPT, image_part],
+            config=config
+        )
+    # The SDK already parses schema-constrained output; response.parsed skips
+    # a redundant json.loads of the full response. Fallback covers older SDK
+    # versions (no .parsed attribute) or calls where it comes back empty.
+    hazard_data = getattr(response, 'parsed', None)
+    if not hazard_data:
+        import json
+        hazard_data = json.loads(response.text)
+    result = (_standardize_hazards(hazard_data), response.text)
+    _disk_cache_set(disk_key, result)
+    return result
+
+def _standardize_hazards(hazard_data):
+    """Standardizes the schema keys for st.session_state."""
+    return {
+        "potholes": hazard_data.get("potholes", 0) + hazard_data.get("large_cracks", 0), # Combine cracks and potholes for simplicity
+        "broken_lights": hazard_data.get("broken_lights", 0),
+        "location": hazard_data.get("location_estimate", "Location Unknown"),
+        "summary": hazard_data.get("ai_confidence_summary", "Analysis complete.")
+    }
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def _gemini_full_report_call(img_hash, _image_bytes, mime_type, prompt_version):
+    """Single round-trip variant: hazard JSON plus a complaint-letter draft.
+
+    Cached identically to _gemini_vision_call (content hash + prompt version),
+    including the on-disk L2.
+    """
+    disk_key = ('report', img_hash, prompt_version)
+    cached = _disk_cache_get(disk_key)
+    if cached is not None:
+        return cached
+
+    client = get_gemini_client()
+    from google.genai import types
+
+    config = types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        response_mime_type="application/json",
+        response_schema=FULL_REPORT_SCHEMA
+    )
+    image_part = types.Part.from_bytes(data=_image_bytes, mime_type=mime_type)
+    response = client.models.generate_content(
+        model='gemini-2.5-flash',
+        contents=[FULL_REPORT_PROMPT, image_part],
+        config=config
+    )
+    # Same as _gemini_vision_call: prefer the SDK's pre-parsed output.
+    report = getattr(response, 'parsed', None)
+    if not report:
+        import json
+        report = json.loads(response.text)
+    final_output = _standardize_hazards(report.get("hazard_report", {}))
+    result = (final_output, report.get("complaint_letter", ""), response.text)
+    _disk_cache_set(disk_key, result)
+    return result
+
+def _prepare_image_call(image_bytes, mime_type):
+    """Shared pre-call step: compact the bytes, settle the mime, hash them."""
+    image_bytes, compact_mime = _compact_image_bytes(image_bytes)
+    mime_type = compact_mime or mime_type or _sniff_mime(image_bytes)
+    # The compacted bytes are hashed, so a resize/quality change naturally
+    # yields a fresh cache key.
+    img_hash = hashlib.sha256(image_bytes).hexdigest()
+    return image_bytes, mime_type, img_hash
+
+def analyze_image_with_gemini(image_bytes, mime_type, client):
+    """
+    Analyzes image bytes using Gemini 2.5 Flash to detect hazards and returns
+    structured data. Takes the bytes directly - the caller reads the uploaded
+    file exactly once and shares the buffer with the display path.
+    """
+    if not client:
+        return {"error": "Gemini client not initialized."}, None
+
+    image_bytes, mime_type, img_hash = _prepare_image_call(image_bytes, mime_type)
+    try:
+        return _gemini_vision_call(img_hash, image_bytes, mime_type, PROMPT_VERSION)
+    except Exception as e:
+        return {"error": f"Gemini API error: {e}"}, None
+
+def analyze_image_full_report(image_bytes, mime_type, client):
+    """
+    One-shot pipeline: detects hazards AND drafts the complaint-letter body in
+    a single Gemini round-trip. Returns (hazard_data, letter_draft, raw_text).
+    """
+    if not client:
+        return {"error": "Gemini client not initialized."}, None, None
+
+    image_bytes, mime_type, img_hash = _prepare_image_call(image_bytes, mime_type)
+    try:
+        return _gemini_full_report_call(img_hash, image_bytes, mime_type, PROMPT_VERSION)
+    except Exception as e:
+        return {"error": f"Gemini API error: {e}"}, None, None
+
+
+# --- Streamlit Module Function (CALLED BY app.py) ---
+def vision_module():
+    """
+    Renders the Visual Intelligence Module UI, using a toggle button to control 
+    when the camera input is displayed.
+    """
+    
+    # 1. Initialize Gemini Client and Camera State
+    client = get_gemini_client()
+    if not client:
+        st.error("Cannot run Module 1. Please ensure your Gemini API Key is in `.streamlit/secrets.toml`.")
+        return
+    
+    # Initialize the camera visibility state
+    if 'show_camera' not in st.session_state:
+        st.session_state.show_camera = False
+
+    st.subheader("1️⃣ Capture or Upload Hazard Image")
+
+    # --- 2. INPUT SELECTION ---
+    
+    input_col1, input_col2 = st.columns(2)
+
+    with input_col1:
+        # Option 2: File Upload, inside a form: picking a file or toggling the
+        # checkbox no longer reruns the whole script - only the single submit
+        # does, collapsing N widget reruns into one per analysis.
+        with st.form(key='vision_form'):
+            uploaded_file = st.file_uploader("📂 Upload an Image File", type=['png', 'jpg', 'jpeg'])
+            # One-shot option: hazards + complaint-letter draft in a single
+            # round-trip instead of a second Gemini call later in Module 3.
+            one_shot = st.checkbox(
+                "📝 Also draft the complaint letter in the same call (saves a round-trip)",
+                key="one_shot_report"
+            )
+            form_submitted = st.form_submit_button(
+                "Analyze for Hazards (Module 1)", use_container_width=True)
+
+    with input_col2:
+        # Toggle Button: Controls the visibility of the camera input.
+        # Stays outside the form since showing the camera genuinely needs
+        # an immediate rerun.
+        if st.button("📸 Open Camera for Live Capture", key="camera_toggle", use_container_width=True):
+            # Toggle the state. This triggers a rerun.
+            st.session_state.show_camera = not st.session_state.show_camera
+
+    # 3. Conditional Camera Input (Only displayed if show_camera is True)
+    camera_image = None
+    if st.session_state.show_camera:
+        # st.camera_input widget only renders when this block executes
+        camera_image = st.camera_input("Capture Road Hazard Now", key="live_camera_input")
+        
+        # If the user captures an image, the widget returns the image. 
+        # If the user clicks 'Clear photo', it returns None. We'll rely on the image being set.
+
+
+    # --- 4. ANALYSIS LOGIC ---
+    
+    # Determine which file to analyze
+    file_to_analyze = None
+    if camera_image is not None:
+        file_to_analyze = camera_image
+    elif uploaded_file is not None:
+        file_to_analyze = uploaded_file
+
+    if file_to_analyze is not None:
+        # Read the bytes exactly once (getvalue doesn't move the file
+        # pointer): the display and the analysis share this one buffer
+        # instead of each re-reading the UploadedFile.
+        image_bytes = file_to_analyze.getvalue()
+        mime_type = getattr(file_to_analyze, 'type', None)
+
+        # Display the file
+        source_type = 'Camera' if camera_image else 'Upload'
+        st.image(image_bytes, caption=f"Image Source: {source_type}", width=400)
+        
+        # --- Analysis Trigger (form submit, or a fresh camera capture) ---
+        if form_submitted:
+
+            with st.spinner("Analyzing image with Gemini Vision..."):
+                # Camera frames arrive as bulky PNG; transcode to JPEG once
+                # here (only on submit) so the hash/cache and upload all see
+                # the compact bytes. Uploads keep their original format.
+                if camera_image is not None:
+                    image_bytes, camera_mime = _camera_png_to_jpeg(image_bytes)
+                    mime_type = camera_mime or mime_type
+                # Pass the already-read bytes to the core function
+                letter_draft = None
+                if one_shot:
+                    hazard_data, letter_draft, raw_response = analyze_image_full_report(image_bytes, mime_type, client)
+                else:
+                    hazard_data, raw_response = analyze_image_with_gemini(image_bytes, mime_type, client)
+
+            if "error" in hazard_data:
+                st.error(f"Analysis Error: {hazard_data['error']}")
+            else:
+                st.success("✅ Hazard Detection Complete!")
+                
+                # --- CRITICAL: Save to Session State ---
+                st.session_state['hazard_data'] = hazard_data
+                st.session_state['image_processed'] = True # Mark as processed
+                if letter_draft:
+                    # Module 3 prefills its complaint body from this draft.
+                    st.session_state['draft_letter'] = letter_draft
+                else:
+                    # Plain analysis: drop any draft left by an earlier
+                    # one-shot run, or Module 3 would keep prefilling a
+                    # letter about a different image instead of its live
+                    # template.
+                    st.session_state.pop('draft_letter', None)
+                
+                # --- Display Results ---
+                st.subheader("Results Summary")
+                
+                col_pothole, col_light = st.columns(2)
+                
+                col_pothole.metric(
+                    label="Potholes/Cracks Detected", 
+                    value=hazard_data.get('potholes', 0)
+                )
+                col_light.metric(
+                    label="Broken Lights", 
+                    value=hazard_data.get('broken_lights', 0)
+                )
+                
+                st.markdown(f"**Location Estimate:** {hazard_data.get('location')}")
+                st.markdown(f"**AI Summary:** *{hazard_data.get('summary')}*")
+                st.warning("💡 Now proceed to **Module 2: Data Analytics** to run the historical risk assessment.")
+
+    elif st.session_state.get('image_processed'):
+        # Show cached results if a file was previously processed
+        hazard_data = st.session_state['hazard_data']
+        st.info("Cached Visual Analysis Found. Upload or capture a new image to re-run.")
+        
+        st.subheader("Results Summary (Cached)")
+        col_pothole, col_light = st.columns(2)
+        col_pothole.metric(label="Potholes/Cracks Detected", value=hazard_data.get('potholes', 0))
+        col_light.metric(label="Broken Lights", value=hazard_data.get('broken_lights', 0))
+        st.markdown(f"**Location Estimate:** {hazard_data.get('location')}")
+        st.markdown(f"**AI Summary:** *{hazard_data.get('summary')}*")